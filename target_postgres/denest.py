@@ -1,8 +1,27 @@
+from collections import OrderedDict
 from copy import deepcopy
 
 from target_postgres import json_schema, singer
 
 
+## Denested table schemas are deterministic in the stream's schema and key properties, and are
+## shared by every batch of the stream. Keyed by the identity of the schema, which
+## `BufferedSingerStream.update_schema` replaces rather than modifies. Only the most recently
+## used entries are kept.
+_TABLE_SCHEMAS_CACHE = OrderedDict()
+_TABLE_SCHEMAS_CACHE_SIZE = 32
+
+## `singer.LEVEL_FMT` column names, by level. `_denest_records` needs one for every nested array
+## it is handed.
+_LEVEL_NAMES = []
+
+
+def _level_name(level):
+    while len(_LEVEL_NAMES) <= level:
+        _LEVEL_NAMES.append(singer.LEVEL_FMT.format(len(_LEVEL_NAMES)))
+    return _LEVEL_NAMES[level]
+
+
 def to_table_batches(schema, key_properties, records):
     """
     Given a schema, and records, get all table schemas and records and prep them
@@ -17,8 +36,8 @@ def to_table_batches(schema, key_properties, records):
                             ...]},
               ...]
     """
-    table_schemas = _get_streamed_table_schemas(schema,
-                                                key_properties)
+    table_schemas = _get_cached_streamed_table_schemas(schema,
+                                                       key_properties)
 
     table_records = _get_streamed_table_records(key_properties,
                                                 records)
@@ -30,6 +49,34 @@ def to_table_batches(schema, key_properties, records):
     return writeable_batches
 
 
+def _get_cached_streamed_table_schemas(schema, key_properties):
+    """
+    `_get_streamed_table_schemas`, cached by the identity of `schema` and the value of `key_properties`.
+    `schema` must not be modified once it has been denested.
+
+    Each TABLE_SCHEMA returned is a new dict, so a batch may set its `path`. Everything nested within
+    it is shared with later batches, and must not be modified.
+
+    :param schema: SingerStreamSchema
+    :param key_properties: [string, ...]
+    :return: [TABLE_SCHEMA(denested_streamed_schema_0), ...]
+    """
+    key = (id(schema), tuple(key_properties))
+    cached = _TABLE_SCHEMAS_CACHE.get(key)
+    if cached is None:
+        ## The entry holds on to `schema`, so its `id` cannot be reused while it is cached
+        cached = (schema, _get_streamed_table_schemas(schema, key_properties))
+        _TABLE_SCHEMAS_CACHE[key] = cached
+        if len(_TABLE_SCHEMAS_CACHE) > _TABLE_SCHEMAS_CACHE_SIZE:
+            _TABLE_SCHEMAS_CACHE.popitem(last=False)
+    else:
+        _TABLE_SCHEMAS_CACHE.move_to_end(key)
+
+    table_schemas = cached[1]
+
+    return [dict(table_schema) for table_schema in table_schemas]
+
+
 def _get_streamed_table_schemas(schema, key_properties):
     """
     Given a `schema` and `key_properties` return the denested/flattened TABLE_SCHEMA of
@@ -42,9 +89,7 @@ def _get_streamed_table_schemas(schema, key_properties):
     root_table_schema = json_schema.simplify(schema)
 
     subtables = {}
-    key_prop_schemas = {}
-    for key in key_properties:
-        key_prop_schemas[key] = schema['properties'][key]
+    key_prop_schemas = {key: schema['properties'][key] for key in key_properties}
     _denest_schema(tuple(), root_table_schema, key_prop_schemas, subtables)
 
     ret = [_to_table_schema(tuple(), None, key_properties, root_table_schema['properties'])]
@@ -113,7 +158,7 @@ def _create_subtable(table_path, table_json_schema, key_prop_schemas, subtables,
     }
 
     for i in range(0, level + 1):
-        new_properties[singer.LEVEL_FMT.format(i)] = {
+        new_properties[_level_name(i)] = {
             'type': ['integer']
         }
 
@@ -245,131 +290,105 @@ def _get_streamed_table_records(key_properties, records):
     return records_map
 
 
-def _denest_subrecord(table_path,
-                      prop_path,
-                      parent_record,
-                      record,
-                      records_map,
-                      key_properties,
-                      pk_fks,
-                      level):
-    """"""
+def _denest_record(table_path, record, records_map, key_properties, pk_fks, level):
     """
-    {...}
+    Flatten the given `record` into `records_map[table_path]`, denesting its arrays into their own tables.
+    Nested objects are walked with a stack rather than by recursing. Records are the output of `json.loads`,
+    so containers are matched by exact type.
+
+    :param record: {...}
+    :return: {(path_0, path_1, ...): (_json_schema_string_type, value), ...}
     """
+    ## Flat records (the common case) are denested in a single pass. Anything nested falls
+    ## through to the full walk below.
+    denested_record = {}
     for prop, value in record.items():
-        """
-        str : {...} | [...] | ???None??? | <literal>
-        """
+        if type(value) is dict or type(value) is list:
+            break
+        if value is not None:
+            denested_record[(prop,)] = (json_schema.python_type(value), value)
+    else:
+        records_map.setdefault(table_path, []).append(denested_record)
+        return denested_record
 
-        if isinstance(value, dict):
-            """
-            {...}
-            """
-            _denest_subrecord(table_path + (prop,),
-                              prop_path + (prop,),
-                              parent_record,
-                              value,
-                              records_map,
-                              key_properties,
-                              pk_fks,
-                              level)
-
-        elif isinstance(value, list):
-            """
-            [...]
-            """
-            _denest_records(table_path + (prop,),
-                            value,
-                            records_map,
-                            key_properties,
-                            pk_fks=pk_fks,
-                            level=level + 1)
-
-        elif value is None:
-            """
-            None
-            """
-            continue
+    denested_record = {}
+    subtables = []
+    stack = [(tuple(), record)]
+    while stack:
+        prop_path, current = stack.pop()
 
-        else:
+        for prop, value in current.items():
             """
-            <literal>
+            str : {...} | [...] | None | <literal>
             """
-            parent_record[prop_path + (prop,)] = (json_schema.python_type(value), value)
 
+            if type(value) is dict:
+                """
+                {...}
+                """
+                stack.append((prop_path + (prop,), value))
+
+            elif type(value) is list:
+                """
+                [...]
+                """
+                subtables.append((prop_path + (prop,), value))
 
-def _denest_record(table_path, record, records_map, key_properties, pk_fks, level):
-    """"""
-    """
-    {...}
-    """
-    denested_record = {}
-    for prop, value in record.items():
-        """
-        str : {...} | [...] | None | <literal>
-        """
+            elif value is None:
+                """
+                None
+                """
+                continue
 
-        if isinstance(value, dict):
-            """
-            {...}
-            """
-            _denest_subrecord(table_path + (prop,),
-                              (prop,),
-                              denested_record,
-                              value,
-                              records_map,
-                              key_properties,
-                              pk_fks,
-                              level)
-
-        elif isinstance(value, list):
-            """
-            [...]
-            """
-            _denest_records(table_path + (prop,),
-                            value,
-                            records_map,
-                            key_properties,
-                            pk_fks=pk_fks,
-                            level=level + 1)
-
-        elif value is None:
-            """
-            None
-            """
-            continue
+            else:
+                """
+                <literal>
+                """
+                denested_record[prop_path + (prop,)] = (json_schema.python_type(value), value)
 
-        else:
-            """
-            <literal>
-            """
-            denested_record[(prop,)] = (json_schema.python_type(value), value)
+    records_map.setdefault(table_path, []).append(denested_record)
 
-    if table_path not in records_map:
-        records_map[table_path] = []
-    records_map[table_path].append(denested_record)
+    for prop_path, value in subtables:
+        _denest_records(table_path + prop_path,
+                        value,
+                        records_map,
+                        key_properties,
+                        pk_fks=pk_fks,
+                        level=level + 1)
+
+    return denested_record
 
 
 def _denest_records(table_path, records, records_map, key_properties, pk_fks=None, level=-1):
     row_index = 0
+    level_key = _level_name(level) if pk_fks else None
     """
     [{...} ...] | [[...] ...] | [literal ...]
     """
     for record in records:
         if pk_fks:
-            record_pk_fks = pk_fks.copy()
-            record_pk_fks[singer.LEVEL_FMT.format(level)] = row_index
+            ## `pk_fks` is shared with the parent, so the level key is set for this
+            ## row and removed once the row (and its children) have been denested
+            pk_fks[level_key] = row_index
 
-            if not isinstance(record, dict):
+            if type(record) is not dict:
                 """
                 [...] | literal
                 """
                 record = {singer.VALUE: record}
 
-            for key, value in record_pk_fks.items():
-                record[key] = value
             row_index += 1
+
+            denested_record = _denest_record(table_path, record, records_map, key_properties, pk_fks, level)
+
+            ## The keys are written straight into the denested row, leaving the source record untouched
+            for key, value in pk_fks.items():
+                if value is None:
+                    denested_record.pop((key,), None)
+                else:
+                    denested_record[(key,)] = (json_schema.python_type(value), value)
+
+            del pk_fks[level_key]
         else:  ## top level
             record_pk_fks = {}
             for key in key_properties:
@@ -377,7 +396,7 @@ def _denest_records(table_path, records, records_map, key_properties, pk_fks=Non
             if singer.SEQUENCE in record:
                 record_pk_fks[singer.SEQUENCE] = record[singer.SEQUENCE]
 
-        """
-        {...}
-        """
-        _denest_record(table_path, record, records_map, key_properties, record_pk_fks, level)
+            """
+            {...}
+            """
+            _denest_record(table_path, record, records_map, key_properties, record_pk_fks, level)
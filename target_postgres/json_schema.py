@@ -32,11 +32,12 @@ def python_type(x):
     :param x:
     :return:
     """
-    if not type(x) in _PYTHON_TYPE_TO_JSON_SCHEMA:
+    json_type = _PYTHON_TYPE_TO_JSON_SCHEMA.get(type(x))
+    if json_type is None:
         raise JSONSchemaError('Unknown type `{}`. Cannot translate to JSONSchema type.'.format(
             str(type(x))
         ))
-    return _PYTHON_TYPE_TO_JSON_SCHEMA[type(x)]
+    return json_type
 
 
 def get_type(schema):
@@ -52,7 +53,8 @@ def get_type(schema):
     if isinstance(t, str):
         return [t]
 
-    return deepcopy(t)
+    ## `type` lists only hold strings, so a shallow copy is enough to let callers mutate the result
+    return list(t)
 
 
 def simple_type(schema):
@@ -580,7 +582,7 @@ def _type_shorthand(type_s):
 
 
 def shorthand(schema):
-    t = deepcopy(get_type(schema))
+    t = get_type(schema)
 
     if 'format' in schema and 'date-time' == schema['format'] and STRING in t:
         t.remove(STRING)
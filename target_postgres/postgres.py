@@ -1,5 +1,6 @@
 from copy import deepcopy
 import csv
+from datetime import datetime
 import io
 import json
 import logging
@@ -9,6 +10,7 @@ import uuid
 import hashlib
 
 import arrow
+import psycopg2.errors
 from psycopg2 import sql
 from psycopg2.extras import LoggingConnection, LoggingCursor
 
@@ -19,6 +21,43 @@ from target_postgres.sql_base import SEPARATOR, SQLInterface
 
 RESERVED_NULL_DEFAULT = 'NULL'
 
+## Size of the reads `copy_expert` makes when streaming rows to the remote
+COPY_BUFFER_SIZE = 65536
+
+## Names of the statements prepared by `PostgresTarget._prepare_statements`. Prepared statements live for the
+##  connection's session, so these are shared by every target using it. Bump the version if the queries change.
+TABLE_METADATA_STATEMENT = 'tp_table_metadata_v1'
+TABLE_SCHEMA_STATEMENT = 'tp_table_schema_v1'
+
+SUBKEY_PATTERN = re.compile(singer.LEVEL_FMT.format('[0-9]+'))
+
+## The date-time shape `_format_datetime` formats without arrow. `datetime.fromisoformat` accepts more than this on
+##  newer Pythons (and rounds differently beyond microseconds), so anything else is left to arrow.
+ISO_DATETIME_PATTERN = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(\.[0-9]{1,6})?(Z|[+-][0-9]{2}:[0-9]{2})')
+
+
+def _format_datetime(value):
+    """
+    Given an ISO-8601 `value`, return it formatted as `YYYY-MM-DD HH:mm:ss.SSSSZZ`, exactly as
+    `arrow` would. Values matching `ISO_DATETIME_PATTERN` are parsed with `datetime.fromisoformat`,
+    everything else is left to `arrow`.
+
+    :param value: string
+    :return: string
+    """
+    if not ISO_DATETIME_PATTERN.fullmatch(value):
+        return arrow.get(value).format('YYYY-MM-DD HH:mm:ss.SSSSZZ')
+
+    try:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return arrow.get(value).format('YYYY-MM-DD HH:mm:ss.SSSSZZ')
+
+    iso = dt.isoformat(' ', 'seconds')
+    return '{}.{:04d}{}'.format(iso[:19], dt.microsecond // 100, iso[19:])
+
 
 def _update_schema_0_to_1(table_metadata, table_schema):
     """
@@ -55,6 +94,33 @@ def _update_schema_1_to_2(table_metadata, table_path):
     return table_metadata
 
 
+_UPDATE_SQL = sql.SQL('''
+    DELETE FROM {table} USING (
+            SELECT "dedupped".*
+            FROM (
+                SELECT *,
+                       ROW_NUMBER() OVER (PARTITION BY {pk_temp_select}
+                                          {distinct_order_by}) AS "pk_ranked"
+                FROM {temp_table} AS "staged"
+                {distinct_order_by}) AS "dedupped"
+            JOIN {table} ON {pk_where}{sequence_join}
+            WHERE pk_ranked = 1
+        ) AS "pks" WHERE {cxt_where};
+    INSERT INTO {table}({insert_columns}) (
+        SELECT {dedupped_columns}
+        FROM (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY {insert_distinct_on}
+                                      {insert_distinct_order_by}) AS "pk_ranked"
+            FROM {temp_table} AS "staged"
+            {insert_distinct_order_by}) AS "dedupped"
+        LEFT JOIN {table} ON {pk_where}
+        WHERE pk_ranked = 1 AND {pk_null}
+    );
+    DROP TABLE {temp_table};
+    ''')
+
+
 class _MillisLoggingCursor(LoggingCursor):
     """
     An implementation of LoggingCursor which tracks duration of queries.
@@ -75,6 +141,11 @@ class MillisLoggingConnection(LoggingConnection):
     """
 
     def filter(self, msg, curs):
+        ## Queries are logged at DEBUG, so skip building messages a logger would only drop
+        if isinstance(self._logobj, (logging.Logger, logging.LoggerAdapter)) \
+                and not self._logobj.isEnabledFor(logging.DEBUG):
+            return None
+
         return "MillisLoggingConnection: {} millis spent executing: {}".format(
             int((time.monotonic() - curs.timestamp) * 1000),
             msg
@@ -86,12 +157,40 @@ class MillisLoggingConnection(LoggingConnection):
 
 
 
-class TransformStream:
-    def __init__(self, fun):
-        self.fun = fun
+class _CSVRowStream:
+    """
+    A readable stream which serializes `rows` to CSV for `copy_expert`.
+
+    A single `csv.writer` is reused for every row, and rows are only serialized as `read`
+    asks for them. `read(size)` returns at most `size` characters, holding on to any remainder.
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = iter(rows)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def read(self, size=-1):
+        columns = self.columns
+        writerow = self.writer.writerow
+        buffer = self.buffer
+
+        while size < 0 or buffer.tell() < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            writerow([row[column] for column in columns])
+
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+        if 0 <= size < len(data):
+            buffer.write(data[size:])
+            data = data[:size]
 
-    def read(self, *args, **kwargs):
-        return self.fun()
+        return data
 
 
 class PostgresTarget(SQLInterface):
@@ -99,6 +198,9 @@ class PostgresTarget(SQLInterface):
     ## NAMEDATALEN - 1.
     # TODO: Figure out way to `SELECT` value from commands
     IDENTIFIER_FIELD_LENGTH = 63
+    ## `serialize_table_record_null_value` returns non NULL values unchanged. Subclasses which override it
+    ## to change non NULL values must set this to False.
+    NULL_VALUE_PASSTHROUGH = True
 
     def __init__(self, connection, *args,
         postgres_schema='public',
@@ -125,14 +227,89 @@ class PostgresTarget(SQLInterface):
         self.postgres_schema = postgres_schema
         self.persist_empty_tables = persist_empty_tables
         self.add_upsert_indexes = add_upsert_indexes
+        self.update_sql_cache = {}
+        self.copy_columns_cache = {}
+        self.table_schema_cache = {}
+
+        self.table_metadata_statement = sql.Identifier(TABLE_METADATA_STATEMENT)
+        self.table_schema_statement = sql.Identifier(TABLE_SCHEMA_STATEMENT)
 
         if self.persist_empty_tables:
             self.LOGGER.debug('PostgresTarget is persisting empty tables')
 
         with self.conn.cursor() as cur:
+            self._prepare_statements(cur)
             self._update_schemas_0_to_1(cur)
             self._update_schemas_1_to_2(cur)
 
+    def _prepare_statements(self, cur):
+        """
+        Given a Cursor for a Postgres Connection, prepare the catalog queries issued for every table
+        touched by every batch, so that they are only parsed and planned once per connection.
+
+        Statements already prepared on the connection (ie, by another target sharing it) are reused.
+
+        :param cur: Cursor
+        :return: None
+        """
+        cur.execute('SELECT name FROM pg_prepared_statements WHERE name IN (%s, %s);',
+                    (TABLE_METADATA_STATEMENT, TABLE_SCHEMA_STATEMENT))
+        prepared = set(row[0] for row in cur.fetchall())
+
+        if TABLE_METADATA_STATEMENT not in prepared:
+            cur.execute(sql.SQL('''
+                PREPARE {}(text, text) AS
+                SELECT d.description
+                FROM pg_class AS c
+                    INNER JOIN pg_namespace AS n ON n.oid = c.relnamespace
+                    LEFT JOIN pg_description AS d ON d.objoid = c.oid
+                                                  AND d.classoid = 'pg_class'::regclass
+                                                  AND d.objsubid = 0
+                WHERE n.nspname = $1 AND c.relname = $2 AND c.relkind IN ('r', 'p');
+            ''').format(self.table_metadata_statement))
+
+        if TABLE_SCHEMA_STATEMENT not in prepared:
+            cur.execute(sql.SQL('''
+                PREPARE {}(text, text) AS
+                SELECT d.description, col.column_name, col.data_type, col.is_nullable
+                FROM pg_class AS c
+                    INNER JOIN pg_namespace AS n ON n.oid = c.relnamespace
+                    LEFT JOIN pg_description AS d ON d.objoid = c.oid
+                                                  AND d.classoid = 'pg_class'::regclass
+                                                  AND d.objsubid = 0
+                    LEFT JOIN information_schema.columns AS col ON col.table_schema = $1
+                                                               AND col.table_name = $2
+                WHERE n.nspname = $1 AND c.relname = $2 AND c.relkind IN ('r', 'p');
+            ''').format(self.table_schema_statement))
+
+    def _execute_prepared_statement(self, cur, statement, params):
+        """
+        Given a Cursor for a Postgres Connection, EXECUTE the prepared `statement` and return its rows.
+
+        When `statement` is missing from the session (ie, after a reconnect), the statements are prepared
+        again and `statement` is retried once. Prepared statements live in the session, so this does not
+        work behind transaction pooling (ie, pgbouncer's `pool_mode = transaction`).
+
+        :param cur: Cursor
+        :param statement: sql.Identifier
+        :param params: (string, string)
+        :return: [(...), ...]
+        """
+        ## A failed statement aborts the open transaction, so the EXECUTE is run within a savepoint
+        try:
+            cur.execute(sql.SQL('SAVEPOINT tp_execute_prepared; EXECUTE {}(%s, %s);').format(statement),
+                        params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            cur.execute('ROLLBACK TO SAVEPOINT tp_execute_prepared;')
+            self._prepare_statements(cur)
+            cur.execute(sql.SQL('EXECUTE {}(%s, %s);').format(statement),
+                        params)
+
+        rows = cur.fetchall()
+        cur.execute('RELEASE SAVEPOINT tp_execute_prepared;')
+
+        return rows
+
     def _update_schemas_0_to_1(self, cur):
         """
         Given a Cursor for a Postgres Connection, upgrade table schemas at version 0 to version 1.
@@ -233,6 +410,7 @@ class PostgresTarget(SQLInterface):
             try:
                 cur.execute('BEGIN;')
 
+                self.table_schema_cache = {}
                 self.setup_table_mapping_cache(cur)
 
                 root_table_name = self.add_table_mapping_helper((stream_buffer.stream,), self.table_mapping_cache)['to']
@@ -304,6 +482,7 @@ class PostgresTarget(SQLInterface):
                 return written_batches_details
             except Exception as ex:
                 cur.execute('ROLLBACK;')
+                self.table_schema_cache = {}
                 message = 'Exception writing records'
                 self.LOGGER.exception(message)
                 raise PostgresError(message, ex)
@@ -313,6 +492,7 @@ class PostgresTarget(SQLInterface):
             try:
                 cur.execute('BEGIN;')
 
+                self.table_schema_cache = {}
                 self.setup_table_mapping_cache(cur)
                 root_table_name = self.add_table_mapping(cur, (stream_buffer.stream,), {})
                 current_table_schema = self.get_table_schema(cur, root_table_name)
@@ -336,14 +516,15 @@ class PostgresTarget(SQLInterface):
                         sql.Literal(self.postgres_schema),
                         sql.Literal(versioned_root_table + '%')))
 
+                    activated_tables = []
+                    swap_statements = []
                     for versioned_table_name in map(lambda x: x[0], cur.fetchall()):
                         table_name = root_table_name + versioned_table_name[len(versioned_root_table):]
-                        table_path = names_to_paths[table_name]
-                        cur.execute(sql.SQL('''
+                        activated_tables.append((table_name, names_to_paths[table_name]))
+                        swap_statements.append(sql.SQL('''
                             ALTER TABLE {table_schema}.{stream_table} RENAME TO {stream_table_old};
                             ALTER TABLE {table_schema}.{version_table} RENAME TO {stream_table};
                             DROP TABLE {table_schema}.{stream_table_old};
-                            COMMIT;
                         ''').format(
                             table_schema=sql.Identifier(self.postgres_schema),
                             stream_table_old=sql.Identifier(table_name +
@@ -351,6 +532,14 @@ class PostgresTarget(SQLInterface):
                                                             'old'),
                             stream_table=sql.Identifier(table_name),
                             version_table=sql.Identifier(versioned_table_name)))
+                        self._invalidate_table_schema(table_name)
+                        self._invalidate_table_schema(versioned_table_name)
+
+                    ## Swap every table for the version in a single round trip
+                    if swap_statements:
+                        cur.execute(sql.Composed(swap_statements))
+
+                    for table_name, table_path in activated_tables:
                         metadata = self._get_table_metadata(cur, table_name)
 
                         self.LOGGER.info('Activated {}, setting path to {}'.format(
@@ -360,8 +549,11 @@ class PostgresTarget(SQLInterface):
 
                         metadata['path'] = table_path
                         self._set_table_metadata(cur, table_name, metadata)
+
+                cur.execute('COMMIT;')
             except Exception as ex:
                 cur.execute('ROLLBACK;')
+                self.table_schema_cache = {}
                 message = '{} - Exception activating table version {}'.format(
                     stream_buffer.stream,
                     version)
@@ -419,6 +611,7 @@ class PostgresTarget(SQLInterface):
             sql.Identifier(name))
 
         cur.execute(sql.SQL('{} ();').format(create_table_sql))
+        self._invalidate_table_schema(name)
 
         self._set_table_metadata(cur, name, {'path': path,
                                              'version': metadata.get('version', None),
@@ -433,112 +626,82 @@ class PostgresTarget(SQLInterface):
         return mapping['to']
 
     def _get_update_sql(self, target_table_name, temp_table_name, key_properties, columns, subkeys):
+        cache_key = (target_table_name, tuple(key_properties), tuple(columns), tuple(subkeys))
+
+        fragments = self.update_sql_cache.get(cache_key)
+        if fragments is None:
+            fragments = self._get_update_sql_fragments(target_table_name, key_properties, columns, subkeys)
+            self.update_sql_cache[cache_key] = fragments
+
+        return _UPDATE_SQL.format(temp_table=sql.Identifier(temp_table_name), **fragments)
+
+    def _get_update_sql_fragments(self, target_table_name, key_properties, columns, subkeys):
+        """
+        Build the composables for `_UPDATE_SQL` which do not depend upon the temp table's name.
+        The temp table is always referenced via the `"staged"` alias.
+
+        :param target_table_name: string
+        :param key_properties: [string, ...]
+        :param columns: [string, ...]
+        :param subkeys: [string, ...]
+        :return: {string: sql.Composable}
+        """
         full_table_name = sql.SQL('{}.{}').format(
             sql.Identifier(self.postgres_schema),
             sql.Identifier(target_table_name))
-        full_temp_table_name = sql.SQL('{}.{}').format(
-            sql.Identifier(self.postgres_schema),
-            sql.Identifier(temp_table_name))
-
-        pk_temp_select_list = []
-        pk_where_list = []
-        pk_null_list = []
-        cxt_where_list = []
-        for pk in key_properties:
-            pk_identifier = sql.Identifier(pk)
-            pk_temp_select_list.append(sql.SQL('{}.{}').format(full_temp_table_name,
-                                                               pk_identifier))
-
-            pk_where_list.append(
-                sql.SQL('{table}.{pk} = "dedupped".{pk}').format(
-                    table=full_table_name,
-                    temp_table=full_temp_table_name,
-                    pk=pk_identifier))
-
-            pk_null_list.append(
-                sql.SQL('{table}.{pk} IS NULL').format(
-                    table=full_table_name,
-                    pk=pk_identifier))
-
-            cxt_where_list.append(
-                sql.SQL('{table}.{pk} = "pks".{pk}').format(
-                    table=full_table_name,
-                    pk=pk_identifier))
-        pk_temp_select = sql.SQL(', ').join(pk_temp_select_list)
-        pk_where = sql.SQL(' AND ').join(pk_where_list)
-        pk_null = sql.SQL(' AND ').join(pk_null_list)
-        cxt_where = sql.SQL(' AND ').join(cxt_where_list)
+        staged = sql.Identifier('staged')
+        dedupped = sql.Identifier('dedupped')
+        sequence = sql.Identifier(singer.SEQUENCE)
+        pk_identifiers = [sql.Identifier(pk) for pk in key_properties]
+
+        pk_temp_select = sql.SQL(', ').join(
+            sql.SQL('{}.{}').format(staged, pk) for pk in pk_identifiers)
+        pk_where = sql.SQL(' AND ').join(
+            sql.SQL('{table}.{pk} = "dedupped".{pk}').format(table=full_table_name, pk=pk) for pk in pk_identifiers)
+        pk_null = sql.SQL(' AND ').join(
+            sql.SQL('{table}.{pk} IS NULL').format(table=full_table_name, pk=pk) for pk in pk_identifiers)
+        cxt_where = sql.SQL(' AND ').join(
+            sql.SQL('{table}.{pk} = "pks".{pk}').format(table=full_table_name, pk=pk) for pk in pk_identifiers)
 
         sequence_join = sql.SQL(' AND "dedupped".{} >= {}.{}').format(
-            sql.Identifier(singer.SEQUENCE),
+            sequence,
             full_table_name,
-            sql.Identifier(singer.SEQUENCE))
+            sequence)
 
         distinct_order_by = sql.SQL(' ORDER BY {}, {}.{} DESC').format(
             pk_temp_select,
-            full_temp_table_name,
-            sql.Identifier(singer.SEQUENCE))
+            staged,
+            sequence)
 
         if len(subkeys) > 0:
-            pk_temp_subkey_select_list = []
-            for pk in (key_properties + subkeys):
-                pk_temp_subkey_select_list.append(sql.SQL('{}.{}').format(full_temp_table_name,
-                                                                          sql.Identifier(pk)))
-            insert_distinct_on = sql.SQL(', ').join(pk_temp_subkey_select_list)
+            insert_distinct_on = sql.SQL(', ').join(
+                sql.SQL('{}.{}').format(staged, pk)
+                for pk in pk_identifiers + [sql.Identifier(subkey) for subkey in subkeys])
 
             insert_distinct_order_by = sql.SQL(' ORDER BY {}, {}.{} DESC').format(
                 insert_distinct_on,
-                full_temp_table_name,
-                sql.Identifier(singer.SEQUENCE))
+                staged,
+                sequence)
         else:
             insert_distinct_on = pk_temp_select
             insert_distinct_order_by = distinct_order_by
 
-        insert_columns_list = []
-        dedupped_columns_list = []
-        for column in columns:
-            insert_columns_list.append(sql.SQL('{}').format(sql.Identifier(column)))
-            dedupped_columns_list.append(sql.SQL('{}.{}').format(sql.Identifier('dedupped'),
-                                                                 sql.Identifier(column)))
-        insert_columns = sql.SQL(', ').join(insert_columns_list)
-        dedupped_columns = sql.SQL(', ').join(dedupped_columns_list)
-
-        return sql.SQL('''
-            DELETE FROM {table} USING (
-                    SELECT "dedupped".*
-                    FROM (
-                        SELECT *,
-                               ROW_NUMBER() OVER (PARTITION BY {pk_temp_select}
-                                                  {distinct_order_by}) AS "pk_ranked"
-                        FROM {temp_table}
-                        {distinct_order_by}) AS "dedupped"
-                    JOIN {table} ON {pk_where}{sequence_join}
-                    WHERE pk_ranked = 1
-                ) AS "pks" WHERE {cxt_where};
-            INSERT INTO {table}({insert_columns}) (
-                SELECT {dedupped_columns}
-                FROM (
-                    SELECT *,
-                           ROW_NUMBER() OVER (PARTITION BY {insert_distinct_on}
-                                              {insert_distinct_order_by}) AS "pk_ranked"
-                    FROM {temp_table}
-                    {insert_distinct_order_by}) AS "dedupped"
-                LEFT JOIN {table} ON {pk_where}
-                WHERE pk_ranked = 1 AND {pk_null}
-            );
-            DROP TABLE {temp_table};
-            ''').format(table=full_table_name,
-                        temp_table=full_temp_table_name,
-                        pk_temp_select=pk_temp_select,
-                        pk_where=pk_where,
-                        cxt_where=cxt_where,
-                        sequence_join=sequence_join,
-                        distinct_order_by=distinct_order_by,
-                        pk_null=pk_null,
-                        insert_distinct_on=insert_distinct_on,
-                        insert_distinct_order_by=insert_distinct_order_by,
-                        insert_columns=insert_columns,
-                        dedupped_columns=dedupped_columns)
+        column_identifiers = [sql.Identifier(column) for column in columns]
+        insert_columns = sql.SQL(', ').join(column_identifiers)
+        dedupped_columns = sql.SQL(', ').join(
+            sql.SQL('{}.{}').format(dedupped, column) for column in column_identifiers)
+
+        return {'table': full_table_name,
+                'pk_temp_select': pk_temp_select,
+                'pk_where': pk_where,
+                'cxt_where': cxt_where,
+                'sequence_join': sequence_join,
+                'distinct_order_by': distinct_order_by,
+                'pk_null': pk_null,
+                'insert_distinct_on': insert_distinct_on,
+                'insert_distinct_order_by': insert_distinct_order_by,
+                'insert_columns': insert_columns,
+                'dedupped_columns': dedupped_columns}
 
     def serialize_table_record_null_value(self, remote_schema, streamed_schema, field, value):
         if value is None:
@@ -546,7 +709,7 @@ class PostgresTarget(SQLInterface):
         return value
 
     def serialize_table_record_datetime_value(self, remote_schema, streamed_schema, field, value):
-        return arrow.get(value).format('YYYY-MM-DD HH:mm:ss.SSSSZZ')
+        return _format_datetime(value)
 
     def persist_csv_rows(self,
                          cur,
@@ -555,15 +718,19 @@ class PostgresTarget(SQLInterface):
                          columns,
                          csv_rows):
 
-        copy = sql.SQL('COPY {}.{} ({}) FROM STDIN WITH CSV NULL AS {}').format(
-            sql.Identifier(self.postgres_schema),
+        copy_columns_key = tuple(columns)
+        copy_columns = self.copy_columns_cache.get(copy_columns_key)
+        if copy_columns is None:
+            copy_columns = sql.SQL(', ').join(map(sql.Identifier, columns))
+            self.copy_columns_cache[copy_columns_key] = copy_columns
+
+        copy = sql.SQL('COPY {} ({}) FROM STDIN WITH CSV NULL AS {}').format(
             sql.Identifier(temp_table_name),
-            sql.SQL(', ').join(map(sql.Identifier, columns)),
+            copy_columns,
             sql.Literal(RESERVED_NULL_DEFAULT))
-        cur.copy_expert(copy, csv_rows)
+        cur.copy_expert(copy, csv_rows, size=COPY_BUFFER_SIZE)
 
-        pattern = re.compile(singer.LEVEL_FMT.format('[0-9]+'))
-        subkeys = list(filter(lambda header: re.match(pattern, header) is not None, columns))
+        subkeys = [column for column in columns if SUBKEY_PATTERN.match(column)]
 
         canonicalized_key_properties = [self.fetch_column_from_path((key_property,), remote_schema)[0]
                                         for key_property in remote_schema['key_properties']]
@@ -579,9 +746,12 @@ class PostgresTarget(SQLInterface):
         remote_schema = table_batch['remote_schema']
 
         ## Create temp table to upload new data to
+        ## - TEMPORARY tables are not WAL logged and live in the session's own schema, so staging
+        ##   data does not churn the target schema's catalog. `ON COMMIT DROP` cleans up should
+        ##   the update not get to its own `DROP TABLE`.
         target_table_name = self.canonicalize_identifier('tmp_' + str(uuid.uuid4()))
         cur.execute(sql.SQL('''
-            CREATE TABLE {schema}.{temp_table} (LIKE {schema}.{table})
+            CREATE TEMPORARY TABLE {temp_table} (LIKE {schema}.{table}) ON COMMIT DROP
         ''').format(
             schema=sql.Identifier(self.postgres_schema),
             temp_table=sql.Identifier(target_table_name),
@@ -590,20 +760,7 @@ class PostgresTarget(SQLInterface):
 
         ## Make streamable CSV records
         csv_headers = list(remote_schema['schema']['properties'].keys())
-        rows_iter = iter(table_batch['records'])
-
-        def transform():
-            try:
-                row = next(rows_iter)
-
-                with io.StringIO() as out:
-                    writer = csv.DictWriter(out, csv_headers)
-                    writer.writerow(row)
-                    return out.getvalue()
-            except StopIteration:
-                return ''
-
-        csv_rows = TransformStream(transform)
+        csv_rows = _CSVRowStream(csv_headers, table_batch['records'])
 
         ## Persist csv rows
         self.persist_csv_rows(cur,
@@ -624,6 +781,21 @@ class PostgresTarget(SQLInterface):
             table_name=sql.Identifier(table_name),
             column_name=sql.Identifier(column_name),
             data_type=sql.SQL(self.json_schema_to_sql_type(column_schema))))
+        self._invalidate_table_schema(table_name)
+
+    def add_columns(self, cur, table_name, columns):
+        cur.execute(sql.SQL('''
+            ALTER TABLE {table_schema}.{table_name}
+            {add_columns};
+        ''').format(
+            table_schema=sql.Identifier(self.postgres_schema),
+            table_name=sql.Identifier(table_name),
+            add_columns=sql.SQL(', ').join(
+                sql.SQL('ADD COLUMN {} {}').format(
+                    sql.Identifier(column_name),
+                    sql.SQL(self.json_schema_to_sql_type(column_schema)))
+                for column_name, column_schema in columns)))
+        self._invalidate_table_schema(table_name)
 
     def migrate_column(self, cur, table_name, from_column, to_column):
         cur.execute(sql.SQL('''
@@ -643,6 +815,7 @@ class PostgresTarget(SQLInterface):
             table_schema=sql.Identifier(self.postgres_schema),
             table_name=sql.Identifier(table_name),
             column_name=sql.Identifier(column_name)))
+        self._invalidate_table_schema(table_name)
 
     def make_column_nullable(self, cur, table_name, column_name):
         cur.execute(sql.SQL('''
@@ -652,6 +825,7 @@ class PostgresTarget(SQLInterface):
             table_schema=sql.Identifier(self.postgres_schema),
             table_name=sql.Identifier(table_name),
             column_name=sql.Identifier(column_name)))
+        self._invalidate_table_schema(table_name)
 
     def add_index(self, cur, table_name, column_names):
         index_name = 'tp_{}_{}_idx'.format(table_name, "_".join(column_names))
@@ -683,37 +857,35 @@ class PostgresTarget(SQLInterface):
             sql.Identifier(self.postgres_schema),
             sql.Identifier(table_name),
             sql.Literal(json.dumps(metadata))))
+        self._invalidate_table_schema(table_name)
 
     def _get_table_metadata(self, cur, table_name):
-        cur.execute(sql.SQL('''
-            SELECT EXISTS (
-                SELECT 1 FROM pg_tables
-                WHERE schemaname = {} AND
-                      tablename = {});
-        ''').format(
-            sql.Literal(self.postgres_schema),
-            sql.Literal(table_name)))
-        table_exists = cur.fetchone()[0]
+        rows = self._execute_prepared_statement(cur,
+                                                self.table_metadata_statement,
+                                                (self.postgres_schema, table_name))
 
-        if not table_exists:
+        if not rows:
             return None
 
-        cur.execute(
-            sql.SQL('SELECT description FROM pg_description WHERE objoid = {}::regclass;').format(
-                sql.Literal(
-                    '"{}"."{}"'.format(self.postgres_schema, table_name))))
-        comment = cur.fetchone()[0]
+        return self._load_table_metadata(rows[0][0])
 
-        if comment:
-            try:
-                comment_meta = json.loads(comment)
-            except:
-                self.LOGGER.exception('Could not load table comment metadata')
-                raise
-        else:
-            comment_meta = None
+    def _load_table_metadata(self, comment):
+        """
+        Given a table's comment, parse the Metadata dict stored within it.
+        :param comment: String
+        :return: Metadata Dict, or None when there is no comment
+        """
+        if not comment:
+            return None
+
+        try:
+            return json.loads(comment)
+        except:
+            self.LOGGER.exception('Could not load table comment metadata')
+            raise
 
-        return comment_meta
+    def _invalidate_table_schema(self, table_name):
+        self.table_schema_cache.pop(table_name, None)
 
     def add_column_mapping(self, cur, table_name, from_path, to_name, mapped_schema):
         metadata = self._get_table_metadata(cur, table_name)
@@ -749,7 +921,7 @@ class PostgresTarget(SQLInterface):
 
     def new_table_indexes(self, schema):
         if self.add_upsert_indexes:
-            upsert_index_column_names = deepcopy(schema.get('key_properties', []))
+            upsert_index_column_names = list(schema.get('key_properties', []))
 
             for column_name__or__path in schema['schema']['properties'].keys():
                 column_path = column_name__or__path
@@ -772,24 +944,27 @@ class PostgresTarget(SQLInterface):
         return not cur.fetchall()[0][0]
 
     def get_table_schema(self, cur, name):
-        return self.__get_table_schema(cur, name)
+        if name not in self.table_schema_cache:
+            self.table_schema_cache[name] = self.__get_table_schema(cur, name)
+
+        ## Callers get their own copy, so modifying it cannot corrupt the cache
+        return deepcopy(self.table_schema_cache[name])
 
     def __get_table_schema(self, cur, name):
         # Purely exists for migration purposes. DO NOT CALL DIRECTLY
-        cur.execute(sql.SQL('''
-            SELECT column_name, data_type, is_nullable FROM information_schema.columns
-            WHERE table_schema = {} and table_name = {};
-        ''').format(
-            sql.Literal(self.postgres_schema), sql.Literal(name)))
+        rows = self._execute_prepared_statement(cur,
+                                                self.table_schema_statement,
+                                                (self.postgres_schema, name))
 
-        properties = {}
-        for column in cur.fetchall():
-            properties[column[0]] = self.sql_type_to_json_schema(column[1], column[2] == 'YES')
+        if not rows:
+            return None
 
-        metadata = self._get_table_metadata(cur, name)
+        properties = {}
+        for _, column_name, data_type, is_nullable in rows:
+            if column_name is not None:
+                properties[column_name] = self.sql_type_to_json_schema(data_type, is_nullable == 'YES')
 
-        if metadata is None and not properties:
-            return None
+        metadata = self._load_table_metadata(rows[0][0])
 
         if metadata is None:
             metadata = {'version': None}
@@ -1,10 +1,10 @@
+from collections import deque
 from copy import deepcopy
+from datetime import datetime, timezone
 import json
-import uuid
+import os
 
-import arrow
 from jsonschema import Draft4Validator, FormatChecker
-from jsonschema.exceptions import ValidationError
 
 from target_postgres import json_schema, singer
 from target_postgres.exceptions import SingerStreamError
@@ -21,12 +21,71 @@ SINGER_VALUE = '_sdc_value'
 
 RAW_LINE_SIZE = '__raw_line_size'
 
+## Number of invalid records a stream holds on to for reporting
+INVALID_RECORDS_RETAINED = 1000
+
+_FORMAT_CHECKER = FormatChecker()
+
+## Validators are shared by every stream with the same schema, as taps tend to re-send identical
+## SCHEMA messages.
+_VALIDATOR_CACHE = {}
+
 
 def get_line_size(line_data):
-    return line_data.get(RAW_LINE_SIZE) or len(json.dumps(line_data))
+    return line_data.get(RAW_LINE_SIZE) or len(json.dumps(line_data, default=str))
+
+
+def _uuid4s(n):
+    """
+    Generate `n` random (version 4) UUID strings from a single `os.urandom` call.
+    :param n: int
+    :return: iterator of string
+    """
+    random_bytes = bytearray(os.urandom(16 * n))
+    ## Set the version (4) and variant (RFC 4122) bits of every UUID at once
+    random_bytes[6::16] = bytes(b & 0x0f | 0x40 for b in random_bytes[6::16])
+    random_bytes[8::16] = bytes(b & 0x3f | 0x80 for b in random_bytes[8::16])
+
+    hex_digits = random_bytes.hex()
+    for i in range(0, 32 * n, 32):
+        yield '{}-{}-{}-{}-{}'.format(hex_digits[i:i + 8],
+                                      hex_digits[i + 8:i + 12],
+                                      hex_digits[i + 12:i + 16],
+                                      hex_digits[i + 16:i + 20],
+                                      hex_digits[i + 20:i + 32])
+
+
+def _get_validator(schema):
+    """
+    Get the (cached) validator for `schema`.
+    :param schema: JSONSchema
+    :return: Draft4Validator
+    """
+    ## `repr` keeps non-JSON values (ie, `Decimal` `multipleOf`s) distinct within the key
+    key = json.dumps(schema, sort_keys=True, default=repr)
+    validator = _VALIDATOR_CACHE.get(key)
+    if validator is None:
+        ## Validate against a private copy, so the cached validator is unaffected by callers mutating `schema`
+        validator = Draft4Validator(deepcopy(schema), format_checker=_FORMAT_CHECKER)
+        _VALIDATOR_CACHE[key] = validator
+    return validator
 
 
 class BufferedSingerStream():
+    __slots__ = ('schema',
+                 'key_properties',
+                 'validator',
+                 'use_uuid_pk',
+                 'stream',
+                 'invalid_records',
+                 'max_rows',
+                 'max_buffer_size',
+                 'invalid_records_detect',
+                 'invalid_records_threshold',
+                 '__buffer',
+                 '__size',
+                 '__lifetime_max_version')
+
     def __init__(self,
                  stream,
                  schema,
@@ -47,7 +106,6 @@ class BufferedSingerStream():
         self.update_schema(schema, key_properties)
 
         self.stream = stream
-        self.invalid_records = []
         self.max_rows = max_rows
         self.max_buffer_size = max_buffer_size
 
@@ -59,18 +117,21 @@ class BufferedSingerStream():
         if self.invalid_records_threshold is None:
             self.invalid_records_threshold = 0
 
+        ## Only the most recent invalid records are kept, as they are never flushed. The bound is never below the
+        ## threshold, so detection still sees every invalid record up to the point it raises.
+        self.invalid_records = deque(maxlen=max(self.invalid_records_threshold, INVALID_RECORDS_RETAINED))
+
         self.__buffer = []
-        self.__count = 0
         self.__size = 0
         self.__lifetime_max_version = None
 
     def update_schema(self, schema, key_properties):
         # In order to determine whether a value _is in_ properties _or not_ we need to flatten `$ref`s etc.
         self.schema = json_schema.simplify(schema)
-        self.key_properties = deepcopy(key_properties)
+        self.key_properties = list(key_properties)
 
         # The validator can handle _many_ more things than our simplified schema, and is, in general handled by third party code
-        self.validator = Draft4Validator(schema, format_checker=FormatChecker())
+        self.validator = _get_validator(schema)
 
         properties = self.schema['properties']
 
@@ -107,14 +168,16 @@ class BufferedSingerStream():
 
     @property
     def count(self):
-        return self.__count
+        return len(self.__buffer)
 
     @property
     def buffer_full(self):
-        if self.__count >= self.max_rows:
+        count = len(self.__buffer)
+
+        if count >= self.max_rows:
             return True
 
-        if self.__count > 0:
+        if count > 0:
             if self.__size >= self.max_buffer_size:
                 return True
 
@@ -134,57 +197,74 @@ class BufferedSingerStream():
         self.__lifetime_max_version = version
 
     def add_record_message(self, record_message):
-        add_record = True
+        version = record_message.get('version')
 
-        self.__update_version(record_message.get('version'))
+        self.__update_version(version)
 
-        if self.__lifetime_max_version != record_message.get('version'):
+        if self.__lifetime_max_version != version:
             return None
 
-        try:
-            self.validator.validate(record_message['record'])
-        except ValidationError as error:
-            add_record = False
-            self.invalid_records.append((error, record_message))
+        ## Only the first error is reported, so stop validating once one is found, without raising it
+        error = next(self.validator.iter_errors(record_message['record']), None)
 
-        if add_record:
+        if error is None:
             self.__buffer.append(record_message)
             self.__size += get_line_size(record_message)
-            self.__count += 1
-        elif self.invalid_records_detect \
+            return None
+
+        self.invalid_records.append((error, record_message))
+
+        if self.invalid_records_detect \
                 and len(self.invalid_records) >= self.invalid_records_threshold:
             raise SingerStreamError(
                 'Invalid records detected above threshold: {}. See `.args` for details.'.format(
                     self.invalid_records_threshold),
-                self.invalid_records)
+                list(self.invalid_records))
 
     def peek_buffer(self):
         return self.__buffer
 
     def get_batch(self):
-        current_time = arrow.get().format('YYYY-MM-DD HH:mm:ss.SSSSZZ')
+        ## Formatted as `YYYY-MM-DD HH:mm:ss.SSSSZZ`
+        now = datetime.now(timezone.utc)
+        current_time = '{}.{:04d}+00:00'.format(now.strftime('%Y-%m-%d %H:%M:%S'), now.microsecond // 100)
+        default_sequence = int(now.timestamp())
+
+        ## Whether records need a generated primary key is fixed for the stream's schema, so it is only
+        ## looked up once per batch
+        use_uuid_pk = self.use_uuid_pk
+        if use_uuid_pk:
+            uuids = _uuid4s(len(self.__buffer))
+
+        ## Bind the `_sdc_*` keys locally, as this loop runs once for every buffered record
+        TABLE_VERSION = singer.TABLE_VERSION
+        RECEIVED_AT = singer.RECEIVED_AT
+        PK = singer.PK
+        BATCHED_AT = singer.BATCHED_AT
+        SEQUENCE = singer.SEQUENCE
 
         records = []
-        for record_message in self.peek_buffer():
+        append = records.append
+        for record_message in self.__buffer:
             record = record_message['record']
 
             if 'version' in record_message:
-                record[singer.TABLE_VERSION] = record_message['version']
+                record[TABLE_VERSION] = record_message['version']
 
-            if 'time_extracted' in record_message and record.get(singer.RECEIVED_AT) is None:
-                record[singer.RECEIVED_AT] = record_message['time_extracted']
+            if 'time_extracted' in record_message and record.get(RECEIVED_AT) is None:
+                record[RECEIVED_AT] = record_message['time_extracted']
 
-            if self.use_uuid_pk and record.get(singer.PK) is None:
-                record[singer.PK] = str(uuid.uuid4())
+            if use_uuid_pk and record.get(PK) is None:
+                record[PK] = next(uuids)
 
-            record[singer.BATCHED_AT] = current_time
+            record[BATCHED_AT] = current_time
 
             if 'sequence' in record_message:
-                record[singer.SEQUENCE] = record_message['sequence']
+                record[SEQUENCE] = record_message['sequence']
             else:
-                record[singer.SEQUENCE] = arrow.get().timestamp
+                record[SEQUENCE] = default_sequence
 
-            records.append(record)
+            append(record)
 
         return records
 
@@ -192,7 +272,6 @@ class BufferedSingerStream():
         _buffer = self.__buffer
         self.__buffer = []
         self.__size = 0
-        self.__count = 0
         return _buffer
 
     def peek_invalid_records(self):
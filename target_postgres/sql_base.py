@@ -52,6 +52,9 @@ class SQLInterface:
 
     IDENTIFIER_FIELD_LENGTH = NotImplementedError('`IDENTIFIER_FIELD_LENGTH` not implemented.')
     LOGGER = singer.get_logger()
+    ## Whether `serialize_table_record_null_value` returns non NULL values unchanged. When True,
+    ## `_serialize_table_records` only calls it for the NULL value, once per batch.
+    NULL_VALUE_PASSTHROUGH = False
 
     def _set_timer_tags(self, metric, job_type, path):
         metric.tags['job_type'] = job_type
@@ -281,6 +284,19 @@ class SQLInterface:
         """
         raise NotImplementedError('`add_column` not implemented.')
 
+    def add_columns(self, connection, table_name, columns):
+        """
+        Add all `columns` in `table_name`. Defaults to calling `add_column` for each column,
+        targets which can add many columns in a single statement should override this.
+
+        :param connection: remote connection, type left to be determined by implementing class
+        :param table_name: string
+        :param columns: [(string, JSON Object Schema), ...]
+        :return: None
+        """
+        for name, schema in columns:
+            self.add_column(connection, table_name, name, schema)
+
     def drop_column(self, connection, table_name, name):
         """
         Drop column `name` in `table_name`.
@@ -358,13 +374,24 @@ class SQLInterface:
         """
         raise NotImplementedError('`remove_column_mapping` not implemented.')
 
-    def _get_mapping(self, existing_schema, path, schema):
+    def _get_mappings_index(self, existing_schema):
+        """
+        Index the mappings of `existing_schema` by their path and type shorthand, for `_get_mapping_from_index`.
+
+        :param existing_schema: TABLE_SCHEMA(remote)
+        :return: {((string, ...), string): string}
+        """
+        mappings_index = {}
         for to, mapping in existing_schema.get('mappings', {}).items():
-            if tuple(mapping['from']) == path \
-                    and json_schema.shorthand(mapping) == json_schema.shorthand(schema):
-                return to
+            mappings_index.setdefault((tuple(mapping['from']), json_schema.shorthand(mapping)), to)
+
+        return mappings_index
+
+    def _get_mapping(self, existing_schema, path, schema):
+        return self._get_mapping_from_index(self._get_mappings_index(existing_schema), path, schema)
 
-        return None
+    def _get_mapping_from_index(self, mappings_index, path, schema):
+        return mappings_index.get((path, json_schema.shorthand(schema)))
 
     def upsert_table_helper(self, connection, schema, metadata, log_schema_changes=True):
         """
@@ -386,7 +413,8 @@ class SQLInterface:
                                   'upsert_table_schema',
                                   table_path) as timer:
 
-            _metadata = deepcopy(metadata)
+            ## Only top level keys are set, so the caller's `metadata` is left untouched by a shallow copy
+            _metadata = dict(metadata)
             _metadata['schema_version'] = CURRENT_SCHEMA_VERSION
 
             table_name = self.add_table_mapping(connection, table_path, _metadata)
@@ -427,12 +455,17 @@ class SQLInterface:
                     single_type_columns.append((m['from'], json_schema.make_nullable(m)))
 
             ## Process new columns against existing
-            table_empty = self.is_table_empty(connection, table_name)
+            ##  Whether the table is empty only matters for new columns, so it is not queried when the
+            ##  streamed schema matches the existing one
+            table_empty = None
+
+            ## New columns are added together, either once all columns have been processed, or
+            ## before any other change is made to the table
+            new_columns = []
 
             for column_path, column_schema in single_type_columns:
                 upsert_table_helper__start__column = time.monotonic()
 
-                canonicalized_column_name = self._canonicalize_column_identifier(column_path, column_schema, mappings)
                 nullable_column_schema = json_schema.make_nullable(column_schema)
 
                 def log_message(msg):
@@ -445,9 +478,17 @@ class SQLInterface:
                                 msg,
                                 _duration_millis(upsert_table_helper__start__column)))
 
+                ## Existing mappings for `column_path`. `mappings` is only changed by branches which end this iteration.
+                column_mappings = [m for m in mappings if m['from'] == column_path]
+
                 ## NEW COLUMN
-                if not column_path in [m['from'] for m in mappings]:
+                if not column_mappings:
+                    canonicalized_column_name = self._canonicalize_column_identifier(column_path,
+                                                                                     column_schema,
+                                                                                     mappings)
                     upsert_table_helper__column = "New column"
+                    if table_empty is None:
+                        table_empty = self.is_table_empty(connection, table_name)
                     ### NON EMPTY TABLE
                     if not table_empty:
                         upsert_table_helper__column += ", non empty table"
@@ -457,10 +498,7 @@ class SQLInterface:
                                 table_name))
                         column_schema = nullable_column_schema
 
-                    self.add_column(connection,
-                                    table_name,
-                                    canonicalized_column_name,
-                                    column_schema)
+                    new_columns.append((canonicalized_column_name, column_schema))
                     self.add_column_mapping(connection,
                                             table_name,
                                             column_path,
@@ -477,23 +515,27 @@ class SQLInterface:
                     continue
 
                 ## EXISTING COLUMNS
+                existing_sql_types = [self.json_schema_to_sql_type(m) for m in column_mappings]
+
                 ### SCHEMAS MATCH
-                if [True for m in mappings if
-                    m['from'] == column_path
-                    and self.json_schema_to_sql_type(m) == self.json_schema_to_sql_type(column_schema)]:
+                if self.json_schema_to_sql_type(column_schema) in existing_sql_types:
                     continue
                 ### NULLABLE SCHEMAS MATCH
                 ###  New column _is not_ nullable, existing column _is_
-                if [True for m in mappings if
-                    m['from'] == column_path
-                    and self.json_schema_to_sql_type(m) == self.json_schema_to_sql_type(nullable_column_schema)]:
+                if self.json_schema_to_sql_type(nullable_column_schema) in existing_sql_types:
                     continue
 
+                ## Only columns which change need a canonicalized name, which is a scan of all `mappings`
+                canonicalized_column_name = self._canonicalize_column_identifier(column_path, column_schema, mappings)
+
+                if new_columns:
+                    self.add_columns(connection, table_name, new_columns)
+                    new_columns = []
+
                 ### NULL COMPATIBILITY
                 ###  New column _is_ nullable, existing column is _not_
-                non_null_original_column = [m for m in mappings if
-                                            m['from'] == column_path and json_schema.shorthand(
-                                                m) == json_schema.shorthand(column_schema)]
+                non_null_original_column = [m for m in column_mappings if
+                                            json_schema.shorthand(m) == json_schema.shorthand(column_schema)]
                 if non_null_original_column:
                     ## MAKE NULLABLE
                     self.make_column_nullable(connection,
@@ -520,7 +562,7 @@ class SQLInterface:
 
                 ### FIRST MULTI TYPE
                 ###  New column matches existing column path, but the types are incompatible
-                duplicate_paths = [m for m in mappings if m['from'] == column_path]
+                duplicate_paths = column_mappings
 
                 if 1 == len(duplicate_paths):
                     existing_mapping = duplicate_paths[0]
@@ -622,27 +664,34 @@ class SQLInterface:
 
                 log_message(upsert_table_helper__column)
 
+            if new_columns:
+                self.add_columns(connection, table_name, new_columns)
+
             if not existing_table:
                 for column_names in self.new_table_indexes(schema):
                     self.add_index(connection, table_name, column_names)
 
             return self._get_table_schema(connection, table_name)
 
-    def _serialize_table_record_field_name(self, remote_schema, path, value_json_schema):
+    def _serialize_table_record_field_name(self, remote_schema, path, value_json_schema, mappings_index=None):
         """
         Returns the appropriate remote field (column) name for `path`.
 
         :param remote_schema: TABLE_SCHEMA(remote)
         :param path: (string, ...)
         :value_json_schema: dict, JSON Schema
+        :param mappings_index: `_get_mappings_index(remote_schema)`, built here when None
         :return: string
         """
 
+        if mappings_index is None:
+            mappings_index = self._get_mappings_index(remote_schema)
+
         simple_json_schema = json_schema.simple_type(value_json_schema)
 
-        mapping = self._get_mapping(remote_schema,
-                                    path,
-                                    simple_json_schema)
+        mapping = self._get_mapping_from_index(mappings_index,
+                                               path,
+                                               simple_json_schema)
 
         if not mapping is None:
             return mapping
@@ -650,9 +699,9 @@ class SQLInterface:
         ## Numbers are valid as `float` OR `int`
         ##  ie, 123.0 and 456 are valid 'number's
         if json_schema.INTEGER in json_schema.get_type(simple_json_schema):
-            mapping = self._get_mapping(remote_schema,
-                                        path,
-                                        {'type': json_schema.NUMBER})
+            mapping = self._get_mapping_from_index(mappings_index,
+                                                   path,
+                                                   {'type': json_schema.NUMBER})
 
             if not mapping is None:
                 return mapping
@@ -719,49 +768,90 @@ class SQLInterface:
         ## Get the default NULL value so we can assign row values when value is _not_ NULL
         NULL_DEFAULT = self.serialize_table_record_null_value(remote_schema, streamed_schema, None, None)
 
+        ## Date-time values repeat heavily within a batch (ie, `_sdc_batched_at` is shared by every
+        ##  record), so each distinct value is only serialized once per batch.
+        serialized_datetimes = {}
+
         serialized_rows = []
 
+        field_names = {}
+
         remote_fields = set(remote_schema['schema']['properties'].keys())
-        default_row = dict([(field, NULL_DEFAULT) for field in remote_fields])
+        default_row = dict.fromkeys(remote_fields, NULL_DEFAULT)
+
+        ## Per path: whether it holds date-times, and its default value (`None` if it has none)
+        path_plans = [(path, path in datetime_paths, default_paths.get(path))
+                      for path in streamed_schema['schema']['properties'].keys()]
+
+        serialize_datetime_value = self.serialize_table_record_datetime_value
+        serialize_null_value = None
+        if not self.NULL_VALUE_PASSTHROUGH:
+            serialize_null_value = self.serialize_table_record_null_value
+        serialize_field_name = self._serialize_table_record_field_name
+        python_type = json_schema.python_type
+
+        ## Field names are looked up against the same `remote_schema` for the whole batch
+        mappings_index = self._get_mappings_index(remote_schema)
 
-        paths = streamed_schema['schema']['properties'].keys()
         for record in records:
 
-            row = deepcopy(default_row)
+            ## Every value in `default_row` is the immutable `NULL_DEFAULT`, so a shallow copy suffices
+            row = default_row.copy()
 
-            for path in paths:
+            for path, is_datetime, default in path_plans:
                 json_schema_string_type, value = record.get(path, (None, None))
 
                 ## Serialize fields which are not present but have default values set
-                if path in default_paths \
+                if default is not None \
                         and value is None:
-                    value = default_paths[path]
-                    json_schema_string_type = json_schema.python_type(value)
+                    value = default
+                    json_schema_string_type = python_type(value)
 
                 if not json_schema_string_type:
                     continue
 
                 ## Serialize datetime to compatible format
-                if path in datetime_paths \
+                if is_datetime \
                         and json_schema_string_type == json_schema.STRING \
                         and value is not None:
-                    value = self.serialize_table_record_datetime_value(remote_schema, streamed_schema, path,
+                    serialized_datetime = serialized_datetimes.get((path, value))
+                    if serialized_datetime is None:
+                        serialized_datetime = serialize_datetime_value(remote_schema,
+                                                                       streamed_schema,
+                                                                       path,
                                                                        value)
-                    value_json_schema = {'type': json_schema.STRING,
-                                         'format': json_schema.DATE_TIME_FORMAT}
+                        serialized_datetimes[(path, value)] = serialized_datetime
+                    value = serialized_datetime
+                    field_key = (path, json_schema.DATE_TIME_FORMAT)
                 else:
-                    value_json_schema = {'type': json_schema_string_type}
+                    field_key = (path, json_schema_string_type)
 
                 ## Serialize NULL default value
-                value = self.serialize_table_record_null_value(remote_schema, streamed_schema, path, value)
-
-                field_name = self._serialize_table_record_field_name(remote_schema,
-                                                                     path,
-                                                                     value_json_schema)
-
-                ## `field_name` is unset
-                if row[field_name] == NULL_DEFAULT:
-                    row[field_name] = value
+                ##  `value` is never NULL here (denesting drops NULLs, and only non NULL defaults are kept), so
+                ##  this is skipped when non NULL values are known to pass through unchanged
+                if serialize_null_value is not None:
+                    value = serialize_null_value(remote_schema, streamed_schema, path, value)
+
+                ## The field a value is written to only depends on its path and type
+                field_name = field_names.get(field_key)
+                if field_name is None:
+                    if field_key[1] == json_schema.DATE_TIME_FORMAT:
+                        value_json_schema = {'type': json_schema.STRING,
+                                             'format': json_schema.DATE_TIME_FORMAT}
+                    else:
+                        value_json_schema = {'type': json_schema_string_type}
+
+                    field_name = serialize_field_name(remote_schema,
+                                                      path,
+                                                      value_json_schema,
+                                                      mappings_index)
+                    ## Every row has the same keys, so an unmapped field is caught once here rather than per value
+                    if field_name not in remote_fields:
+                        raise KeyError(field_name)
+                    field_names[field_key] = field_name
+
+                ## Each field is mapped from a single path, so no other value in this record has set it
+                row[field_name] = value
 
             serialized_rows.append(row)
 
@@ -842,6 +932,9 @@ class SQLInterface:
                             table_batch_counter.increment(batch_rows_persisted)
                             batch_counter.increment(batch_rows_persisted)
 
+                            ## Release this table's denested records before moving on to the next table
+                            table_batch['records'] = None
+
                 return {
                     'records_persisted': len(records),
                     'rows_persisted': batch_counter.value
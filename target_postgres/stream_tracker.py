@@ -54,13 +54,14 @@ class StreamTracker:
             self._emit_safe_queued_states()
 
     def handle_record_message(self, stream, line_data):
-        if stream not in self.streams:
+        stream_buffer = self.streams.get(stream)
+        if stream_buffer is None:
             raise TargetError('A record for stream {} was encountered before a corresponding schema'.format(stream))
 
         self.message_counter += 1
         self.streams_added_to.add(stream)
         self.stream_add_watermarks[stream] = self.message_counter
-        self.streams[stream].add_record_message(line_data)
+        stream_buffer.add_record_message(line_data)
 
     def _write_batch_and_update_watermarks(self, stream):
         stream_buffer = self.streams[stream]
@@ -4,6 +4,7 @@ import json
 import pkg_resources
 import sys
 import threading
+import urllib.parse
 import decimal
 
 import singer
@@ -16,6 +17,9 @@ from target_postgres.stream_tracker import StreamTracker
 
 LOGGER = singer.get_logger()
 
+## stdin is read in large chunks: Singer streams are long runs of (potentially wide) JSON lines
+STDIN_BUFFER_SIZE = 1048576
+
 
 def main(target):
     """
@@ -24,7 +28,11 @@ def main(target):
     :return: None
     """
     config = utils.parse_args([]).config
-    input_stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    input_stream = io.open(sys.stdin.fileno(),
+                           mode='r',
+                           buffering=STDIN_BUFFER_SIZE,
+                           encoding='utf-8',
+                           closefd=False)
     stream_to_target(input_stream, target, config=config)
 
     return None
@@ -52,8 +60,12 @@ def stream_to_target(stream, target, config={}):
         max_batch_rows = config.get('max_batch_rows', 200000)
         max_batch_size = config.get('max_batch_size', 104857600)  # 100MB
         batch_detection_threshold = config.get('batch_detection_threshold', max(max_batch_rows / 40, 50))
+        ## Wide records can fill a buffer well before `batch_detection_threshold` rows have been received,
+        ##  so buffers are also checked every `batch_detection_size` bytes received
+        batch_detection_size = config.get('batch_detection_size', max_batch_size / 40 if max_batch_size else None)
 
-        line_count = 0
+        rows_until_detection = batch_detection_threshold
+        size_since_detection = 0
         for line in stream:
             _line_handler(state_tracker,
                           target,
@@ -63,9 +75,13 @@ def stream_to_target(stream, target, config={}):
                           max_batch_size,
                           line
                           )
-            if line_count > 0 and line_count % batch_detection_threshold == 0:
+            rows_until_detection -= 1
+            size_since_detection += len(line)
+            if rows_until_detection <= 0 \
+                    or (batch_detection_size and size_since_detection >= batch_detection_size):
                 state_tracker.flush_streams()
-            line_count += 1
+                rows_until_detection = batch_detection_threshold
+                size_since_detection = 0
 
         state_tracker.flush_streams(force=True)
         _run_sql_hook('after_run_sql', config, target)
@@ -99,6 +115,15 @@ def _line_handler(state_tracker, target, invalid_records_detect, invalid_records
     if 'type' not in line_data:
         raise TargetError('`type` is a required key: {}'.format(line))
 
+    ## RECORDs are nearly every message in a stream, so they are handled in place
+    if line_data['type'] == 'RECORD':
+        if 'stream' not in line_data:
+            raise TargetError('`stream` is a required key: {}'.format(line))
+
+        line_data[RAW_LINE_SIZE] = len(line)
+        state_tracker.handle_record_message(line_data['stream'], line_data)
+        return
+
     if line_data['type'] == 'SCHEMA':
         if 'stream' not in line_data:
             raise TargetError('`stream` is a required key: {}'.format(line))
@@ -133,12 +158,6 @@ def _line_handler(state_tracker, target, invalid_records_detect, invalid_records
             state_tracker.register_stream(stream, buffered_stream)
         else:
             state_tracker.streams[stream].update_schema(schema, key_properties)
-    elif line_data['type'] == 'RECORD':
-        if 'stream' not in line_data:
-            raise TargetError('`stream` is a required key: {}'.format(line))
-
-        line_data[RAW_LINE_SIZE] = len(line)
-        state_tracker.handle_record_message(line_data['stream'], line_data)
     elif line_data['type'] == 'ACTIVATE_VERSION':
         if 'stream' not in line_data:
             raise TargetError('`stream` is a required key: {}'.format(line))
@@ -161,8 +180,9 @@ def _line_handler(state_tracker, target, invalid_records_detect, invalid_records
 
 def _send_usage_stats():
     try:
-        version = pkg_resources.get_distribution('target-postgres').version
-        with http.client.HTTPConnection('collector.singer.io', timeout=10).connect() as conn:
+        version = pkg_resources.get_distribution('singer-target-postgres').version
+        conn = http.client.HTTPConnection('collector.singer.io', timeout=10)
+        try:
             params = {
                 'e': 'se',
                 'aid': 'singer',
@@ -172,6 +192,8 @@ def _send_usage_stats():
             }
             conn.request('GET', '/i?' + urllib.parse.urlencode(params))
             conn.getresponse()
+        finally:
+            conn.close()
     except:
         LOGGER.debug('Collection request failed')
 
@@ -180,7 +202,8 @@ def _async_send_usage_stats():
     LOGGER.info('Sending version information to singer.io. ' +
                 'To disable sending anonymous usage data, set ' +
                 'the config parameter "disable_collection" to true')
-    threading.Thread(target=_send_usage_stats()).start()
+    ## A daemon thread, so neither startup nor exit waits on the collector
+    threading.Thread(target=_send_usage_stats, daemon=True).start()
 
 
 def _run_sql_hook(hook_name, config, target):
@@ -1,10 +1,13 @@
 from decimal import Decimal
 from copy import deepcopy
+import uuid
 
+import arrow
 import pytest
 
 from target_postgres import singer
-from target_postgres.singer_stream import BufferedSingerStream, SingerStreamError, RAW_LINE_SIZE
+from target_postgres.singer_stream import BufferedSingerStream, SingerStreamError, INVALID_RECORDS_RETAINED, \
+    RAW_LINE_SIZE
 
 from utils.fixtures import CatStream, InvalidCatStream, CATS_SCHEMA
 
@@ -53,6 +56,49 @@ def test_init__empty_key_properties():
     assert [] == rows_missing_pk
 
 
+def test_init__empty_key_properties__uuid_pks():
+    singer_stream = BufferedSingerStream(CATS_SCHEMA['stream'],
+                                         CATS_SCHEMA['schema'],
+                                         [])
+
+    stream = CatStream(100)
+    for _ in range(20):
+        singer_stream.add_record_message(stream.generate_record_message())
+
+    pks = [uuid.UUID(r[singer.PK]) for r in singer_stream.get_batch()]
+
+    assert 20 == len(set(pks))
+    assert {4} == set(pk.version for pk in pks)
+    assert {uuid.RFC_4122} == set(pk.variant for pk in pks)
+
+
+def test_get_batch__batched_at_format():
+    singer_stream = BufferedSingerStream(CATS_SCHEMA['stream'],
+                                         CATS_SCHEMA['schema'],
+                                         CATS_SCHEMA['key_properties'])
+
+    stream = CatStream(5)
+    for _ in range(5):
+        singer_stream.add_record_message(stream.generate_record_message())
+
+    batched_ats = set(r[singer.BATCHED_AT] for r in singer_stream.get_batch())
+
+    assert 1 == len(batched_ats)
+    batched_at = batched_ats.pop()
+    assert arrow.get(batched_at).format('YYYY-MM-DD HH:mm:ss.SSSSZZ') == batched_at
+
+
+def test_init__shares_validator_for_equal_schemas():
+    stream_a = BufferedSingerStream(CATS_SCHEMA['stream'],
+                                    deepcopy(CATS_SCHEMA['schema']),
+                                    CATS_SCHEMA['key_properties'])
+    stream_b = BufferedSingerStream(CATS_SCHEMA['stream'],
+                                    deepcopy(CATS_SCHEMA['schema']),
+                                    CATS_SCHEMA['key_properties'])
+
+    assert stream_a.validator is stream_b.validator
+
+
 def test_add_record_message():
     stream = CatStream(10)
     singer_stream = BufferedSingerStream(CATS_SCHEMA['stream'],
@@ -117,6 +163,25 @@ def test_add_record_message__multipleOf():
     assert singer_stream.count == len(multiple_of_values)
 
 
+def test_add_record_message__multipleOf__without_raw_line_size():
+    stream_name = 'test'
+    singer_stream = BufferedSingerStream(stream_name,
+                                         deepcopy(SIMPLE_MULTIPLE_OF_VALID_SCHEMA),
+                                         [])
+
+    singer_stream.add_record_message(
+        {
+            'type': 'RECORD',
+            'stream': stream_name,
+            'record': {'multipleOfKey': Decimal('1.1')},
+            'sequence': 0
+        }
+    )
+
+    assert not singer_stream.peek_invalid_records()
+    assert singer_stream.count == 1
+
+
 def test_add_record_message__multipleOf_invalid_record():
     stream_name = 'test'
     singer_stream = BufferedSingerStream(stream_name,
@@ -252,6 +317,20 @@ def test_add_record_message__invalid_record__detection_off():
     assert [] == missing_sdc_properties(singer_stream)
 
 
+def test_add_record_message__invalid_record__detection_off__bounded():
+    stream = InvalidCatStream(INVALID_RECORDS_RETAINED + 5)
+    singer_stream = BufferedSingerStream(CATS_SCHEMA['stream'],
+                                         CATS_SCHEMA['schema'],
+                                         CATS_SCHEMA['key_properties'],
+                                         invalid_records_detect=False)
+
+    for _ in range(INVALID_RECORDS_RETAINED + 5):
+        singer_stream.add_record_message(stream.generate_record_message())
+
+    assert INVALID_RECORDS_RETAINED == len(singer_stream.peek_invalid_records())
+    assert singer_stream.count == 0
+
+
 def test_add_record_message__invalid_record__cross_threshold():
     stream = InvalidCatStream(10)
 
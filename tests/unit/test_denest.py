@@ -53,6 +53,61 @@ def test_empty():
     assert [] == denested[0]['streamed_schema']['key_properties']
 
 
+def test__schema__cached_between_batches():
+    schema = {'properties': {'a': {'type': 'integer'},
+                             'b': {'type': 'array',
+                                   'items': {'type': 'string'}}}}
+
+    first = denest.to_table_batches(schema, ['a'], [])
+    first[0]['streamed_schema']['path'] = ('root',) + first[0]['streamed_schema']['path']
+
+    second = denest.to_table_batches(schema, ['a'], [])
+
+    assert () == second[0]['streamed_schema']['path']
+    assert first[1]['streamed_schema'] is not second[1]['streamed_schema']
+    assert first[1]['streamed_schema']['schema'] is second[1]['streamed_schema']['schema']
+
+
+def test__schema__cache_bounded():
+    schema = {'properties': {'a': {'type': 'integer'}}}
+    denest.to_table_batches(schema, [], [])
+
+    for i in range(denest._TABLE_SCHEMAS_CACHE_SIZE):
+        denest.to_table_batches({'properties': {'a': {'type': 'integer'},
+                                                'b{}'.format(i): {'type': 'string'}}},
+                                [],
+                                [])
+
+    assert denest._TABLE_SCHEMAS_CACHE_SIZE == len(denest._TABLE_SCHEMAS_CACHE)
+    assert (id(schema), ()) not in denest._TABLE_SCHEMAS_CACHE
+
+
+def test__schema__cache_replaced_schema():
+    schema = {'properties': {'a': {'type': 'integer'}}}
+    denest.to_table_batches(schema, [], [])
+
+    updated_schema = {'properties': {'a': {'type': 'integer'},
+                                     'b': {'type': 'string'}}}
+    denested = denest.to_table_batches(updated_schema, [], [])
+
+    assert ('b',) in denested[0]['streamed_schema']['schema']['properties']
+
+
+def test__schema__cached__unmodified_between_batches():
+    schema = {'type': 'object',
+              'properties': {'a': {'type': 'integer'},
+                             'b': {'type': 'array',
+                                   'items': {'type': 'string'}}}}
+
+    first = denest.to_table_batches(schema, [], [])
+    expected = denest.to_table_batches(schema, [], [])
+
+    for table_batch in first:
+        table_batch['streamed_schema']['path'] = ('modified',) + table_batch['streamed_schema']['path']
+
+    assert expected == denest.to_table_batches(schema, [], [])
+
+
 def test__schema__objects_add_fields():
     denested = error_check_denest({'properties':
                                             {'a': {'type': 'integer'},
@@ -279,6 +334,39 @@ def test__records__nested__child_table__a_b_c_e():
         assert bool == type(record[('g',)][1])
 
 
+def test__records__nested__objects_and_child_keys():
+    records = [{'id': 1, 'a': {'b': {'c': 'hello'}, 'd': [{'e': {'f': 2}}, {'e': {'f': 3}}]}}]
+    denested = error_check_denest(
+        {'properties': {
+            'id': {'type': 'integer'},
+            'a': {'type': 'object',
+                  'properties': {
+                      'b': {'type': 'object',
+                            'properties': {
+                                'c': {'type': 'string'}}},
+                      'd': {'type': 'array',
+                            'items': {'type': 'object',
+                                      'properties': {
+                                          'e': {'type': 'object',
+                                                'properties': {
+                                                    'f': {'type': 'integer'}}}}}}}}}},
+        ['id'],
+        records)
+
+    ## Source child records are left untouched
+    assert [{'e': {'f': 2}}, {'e': {'f': 3}}] == records[0]['a']['d']
+
+    root = _get_table_batch_with_path(denested, tuple())
+    assert [{('id',): ('integer', 1),
+             ('a', 'b', 'c'): ('string', 'hello')}] == root['records']
+
+    child = _get_table_batch_with_path(denested, ('a', 'd'))
+    assert [2, 3] == [record[('e', 'f')][1] for record in child['records']]
+    assert [0, 1] == [record[(singer.LEVEL_FMT.format(0),)][1] for record in child['records']]
+    for record in child['records']:
+        assert ('integer', 1) == record[(singer.SOURCE_PK_PREFIX + 'id',)]
+
+
 def test__anyOf__schema__stitch_date_times():
     denested = error_check_denest(
         {'properties': {
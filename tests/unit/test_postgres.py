@@ -1,7 +1,9 @@
 from copy import deepcopy
 from datetime import datetime
 import json
+import logging
 
+import arrow
 import psycopg2
 from psycopg2 import sql
 import psycopg2.extras
@@ -156,6 +158,219 @@ def assert_column_indexed(conn, table_name, column_name):
 
         assert len(cur.fetchall()) > 0
 
+def test_millis_logging_connection__filter_skips_when_debug_disabled(db_cleanup):
+    logger = logging.getLogger('test_millis_logging_connection')
+
+    with psycopg2.connect(connection_factory=postgres.MillisLoggingConnection, **TEST_DB) as conn:
+        conn.initialize(logger)
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1;')
+
+            logger.setLevel(logging.INFO)
+            assert conn.filter(cur.query, cur) is None
+
+            logger.setLevel(logging.DEBUG)
+            assert 'millis spent executing' in conn.filter(cur.query, cur)
+
+
+def test_format_datetime__matches_arrow():
+    for value in ['2019-08-12T18:12:35.022218Z',
+                  '2019-08-12T18:12:35Z',
+                  '2019-08-12 18:12:35.1+05:30',
+                  '2019-08-12T18:12:35-07:00',
+                  '2019-08-12T18:12',
+                  '2019-08-12',
+                  '2019-224',
+                  '0999-01-01T00:00:00Z',
+                  '2019-08-12T18:12:35.9999999Z',
+                  '2019-08-12T18:12:35.0000995Z',
+                  '2019-08-12T18:12:35.1234567+05:30',
+                  '2019-08-12T18:12:35.12345-07:00']:
+        assert arrow.get(value).format('YYYY-MM-DD HH:mm:ss.SSSSZZ') == postgres._format_datetime(value)
+
+
+def test_format_datetime__rejects_what_arrow_rejects():
+    for value in ['2019-W33-1',
+                  '2019-08-12T18:12:35+05:30:15',
+                  '2019-08-12 18:12:35 +05:00']:
+        with pytest.raises(arrow.parser.ParserError):
+            arrow.get(value)
+        with pytest.raises(arrow.parser.ParserError):
+            postgres._format_datetime(value)
+
+
+def test_serialize_table_records__rows_do_not_share_defaults(db_cleanup):
+    with psycopg2.connect(**TEST_DB) as conn:
+        target = postgres.PostgresTarget(conn)
+
+        remote_schema = {'path': ('cats',),
+                         'schema': {'properties': {'a': {'type': ['integer', 'null']},
+                                                   'b': {'type': ['integer', 'null']}}},
+                         'mappings': {'a': {'type': ['integer', 'null'], 'from': ['a']},
+                                      'b': {'type': ['integer', 'null'], 'from': ['b']}}}
+        streamed_schema = {'schema': {'properties': {('a',): {'anyOf': [{'type': ['integer', 'null']}]},
+                                                     ('b',): {'anyOf': [{'type': ['integer', 'null']}]}}}}
+
+        rows = target._serialize_table_records(remote_schema,
+                                               streamed_schema,
+                                               [{('a',): ('integer', 1), ('b',): ('integer', 2)},
+                                                {('a',): ('integer', 3)},
+                                                {}])
+
+        assert rows == [{'a': 1, 'b': 2},
+                        {'a': 3, 'b': postgres.RESERVED_NULL_DEFAULT},
+                        {'a': postgres.RESERVED_NULL_DEFAULT, 'b': postgres.RESERVED_NULL_DEFAULT}]
+
+
+def test_serialize_table_records__overridden_null_value_serialization(db_cleanup):
+    class UpperCaseTarget(postgres.PostgresTarget):
+        NULL_VALUE_PASSTHROUGH = False
+
+        def serialize_table_record_null_value(self, remote_schema, streamed_schema, field, value):
+            if value is None:
+                return postgres.RESERVED_NULL_DEFAULT
+            return value.upper()
+
+    with psycopg2.connect(**TEST_DB) as conn:
+        remote_schema = {'path': ('cats',),
+                         'schema': {'properties': {'a': {'type': ['string', 'null']}}},
+                         'mappings': {'a': {'type': ['string', 'null'], 'from': ['a']}}}
+        streamed_schema = {'schema': {'properties': {('a',): {'anyOf': [{'type': ['string', 'null']}]}}}}
+        records = [{('a',): ('string', 'tabby')}, {}]
+
+        assert postgres.PostgresTarget(conn)._serialize_table_records(remote_schema, streamed_schema, records) \
+               == [{'a': 'tabby'}, {'a': postgres.RESERVED_NULL_DEFAULT}]
+        assert UpperCaseTarget(conn)._serialize_table_records(remote_schema, streamed_schema, records) \
+               == [{'a': 'TABBY'}, {'a': postgres.RESERVED_NULL_DEFAULT}]
+
+
+def test_serialize_table_records__unmapped_column(db_cleanup):
+    with psycopg2.connect(**TEST_DB) as conn:
+        remote_schema = {'path': ('cats',),
+                         'schema': {'properties': {'a': {'type': ['string', 'null']}}},
+                         'mappings': {'b': {'type': ['string', 'null'], 'from': ['a']}}}
+        streamed_schema = {'schema': {'properties': {('a',): {'anyOf': [{'type': ['string', 'null']}]}}}}
+
+        with pytest.raises(KeyError):
+            postgres.PostgresTarget(conn)._serialize_table_records(remote_schema,
+                                                                   streamed_schema,
+                                                                   [{('a',): ('string', 'tabby')}])
+
+
+def test_serialize_table_record_field_name(db_cleanup):
+    with psycopg2.connect(**TEST_DB) as conn:
+        target = postgres.PostgresTarget(conn)
+
+        remote_schema = {'path': ('cats',),
+                         'schema': {'properties': {'a': {'type': ['number', 'null']},
+                                                   'a__s': {'type': ['string', 'null']}}},
+                         'mappings': {'a': {'type': ['number', 'null'], 'from': ['a']},
+                                      'a__s': {'type': ['string', 'null'], 'from': ['a']}}}
+
+        assert 'a' == target._get_mapping(remote_schema, ('a',), {'type': 'number'})
+        assert 'a__s' == target._serialize_table_record_field_name(remote_schema, ('a',), {'type': 'string'})
+        ## Integers are stored in `number` columns
+        assert 'a' == target._serialize_table_record_field_name(remote_schema, ('a',), {'type': 'integer'})
+
+        mappings_index = target._get_mappings_index(remote_schema)
+        assert 'a__s' == target._get_mapping_from_index(mappings_index, ('a',), {'type': 'string'})
+        assert 'a' == target._serialize_table_record_field_name(remote_schema,
+                                                                ('a',),
+                                                                {'type': 'integer'},
+                                                                mappings_index)
+
+        with pytest.raises(Exception, match=r'A compatible column for path'):
+            target._serialize_table_record_field_name(remote_schema, ('a',), {'type': 'boolean'})
+
+
+def test_prepared_statements__shared_between_targets_on_a_connection(db_cleanup):
+    with psycopg2.connect(**TEST_DB) as conn:
+        postgres.PostgresTarget(conn)
+        postgres.PostgresTarget(conn)
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT name FROM pg_prepared_statements WHERE name LIKE 'tp\\_%' ORDER BY name;")
+            assert [(postgres.TABLE_METADATA_STATEMENT,), (postgres.TABLE_SCHEMA_STATEMENT,)] == cur.fetchall()
+
+
+def test_prepared_statements__prepared_again_when_missing(db_cleanup):
+    main(CONFIG, input_stream=CatStream(1))
+
+    with psycopg2.connect(**TEST_DB) as conn:
+        target = postgres.PostgresTarget(conn)
+
+        with conn.cursor() as cur:
+            expected_metadata = target._get_table_metadata(cur, 'cats')
+            expected_schema = target.get_table_schema(cur, 'cats')
+
+            ## Within the transaction opened by the lookups above
+            cur.execute('DEALLOCATE ALL;')
+            assert expected_metadata == target._get_table_metadata(cur, 'cats')
+
+            cur.execute(sql.SQL('DEALLOCATE {};').format(sql.Identifier(postgres.TABLE_SCHEMA_STATEMENT)))
+            target.table_schema_cache.clear()
+            assert expected_schema == target.get_table_schema(cur, 'cats')
+
+            cur.execute("SELECT name FROM pg_prepared_statements WHERE name LIKE 'tp\\_%' ORDER BY name;")
+            assert [(postgres.TABLE_METADATA_STATEMENT,), (postgres.TABLE_SCHEMA_STATEMENT,)] == cur.fetchall()
+
+
+def test_get_table_schema__cached_copy(db_cleanup):
+    main(CONFIG, input_stream=CatStream(1))
+
+    with psycopg2.connect(**TEST_DB) as conn:
+        target = postgres.PostgresTarget(conn)
+
+        with conn.cursor() as cur:
+            table_schema = target.get_table_schema(cur, 'cats')
+            expected = deepcopy(table_schema)
+
+            table_schema['mappings'].clear()
+            table_schema['schema']['properties'].clear()
+
+            assert expected == target.get_table_schema(cur, 'cats')
+
+
+def test_upsert_table_helper__leaves_schema_unmodified(db_cleanup):
+    table_schema = {'type': 'TABLE_SCHEMA',
+                    'path': ('cats',),
+                    'level': None,
+                    'key_properties': ['id'],
+                    'mappings': [],
+                    'schema': {'type': 'object',
+                               'additionalProperties': False,
+                               'properties': {('id',): {'anyOf': [{'type': ['integer']}]},
+                                              ('name',): {'anyOf': [{'type': ['string', 'null']},
+                                                                    {'type': ['integer', 'null']}]}}}}
+    expected = deepcopy(table_schema)
+
+    with psycopg2.connect(**TEST_DB) as conn:
+        target = postgres.PostgresTarget(conn)
+
+        with conn.cursor() as cur:
+            target.setup_table_mapping_cache(cur)
+            target.upsert_table_helper(cur, table_schema, {'version': None})
+            target.upsert_table_helper(cur, table_schema, {'version': None})
+
+    assert expected == table_schema
+
+
+def test_csv_row_stream__read_honours_size():
+    rows = [{'a': i, 'b': 'x"y,z' * i} for i in range(200)]
+
+    chunks = []
+    stream = postgres._CSVRowStream(['a', 'b'], rows)
+    while True:
+        chunk = stream.read(100)
+        assert len(chunk) <= 100
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    assert postgres._CSVRowStream(['a', 'b'], rows).read() == ''.join(chunks)
+    assert '0,\r\n' == ''.join(chunks)[:4]
+
+
 def test_loading__invalid__configuration__schema(db_cleanup):
     stream = CatStream(1)
     stream.schema = deepcopy(stream.schema)
@@ -2014,6 +2229,28 @@ def test_multiple_batches_upsert(db_cleanup):
         assert_records(conn, stream.records, 'cats', 'id')
 
 
+def test_upsert__unchanged_schema__skips_table_empty_check(db_cleanup, monkeypatch):
+    main(CONFIG, input_stream=CatStream(10, nested_count=2))
+
+    checked = []
+    is_table_empty = postgres.PostgresTarget.is_table_empty
+
+    def counting_is_table_empty(self, cur, table_name):
+        checked.append(table_name)
+        return is_table_empty(self, cur, table_name)
+
+    monkeypatch.setattr(postgres.PostgresTarget, 'is_table_empty', counting_is_table_empty)
+
+    main(CONFIG, input_stream=CatStream(10, nested_count=2))
+
+    assert checked == []
+
+    with psycopg2.connect(**TEST_DB) as conn:
+        with conn.cursor() as cur:
+            cur.execute(get_count_sql('cats'))
+            assert cur.fetchone()[0] == 10
+
+
 def test_multiple_batches_by_memory_upsert(db_cleanup):
     config = CONFIG.copy()
     config['max_batch_size'] = 1024
@@ -48,6 +48,16 @@ def test_usage_stats():
         assert mock.call_count == 1
 
 
+def test_usage_stats__sent_in_background():
+    with patch.object(target_tools, 'threading') as mock_threading, \
+            patch.object(target_tools, '_send_usage_stats') as mock_send:
+        target_tools._async_send_usage_stats()
+
+        assert mock_send.call_count == 0
+        mock_threading.Thread.assert_called_once_with(target=mock_send, daemon=True)
+        mock_threading.Thread.return_value.start.assert_called_once_with()
+
+
 def test_loading__invalid__records():
     with pytest.raises(singer_stream.SingerStreamError, match=r'.*'):
         target_tools.stream_to_target(InvalidCatStream(1), None, config=CONFIG)
@@ -115,6 +125,34 @@ def test_activate_version():
     assert rows_persisted == expected_rows
 
 
+def test_batch_detection_size():
+    config = CONFIG.copy()
+    config['max_batch_size'] = 4096
+    config['batch_detection_threshold'] = 10000
+
+    target = Target()
+
+    target_tools.stream_to_target(CatStream(100), target, config=config)
+
+    ## Buffers are checked by bytes received, long before `batch_detection_threshold` rows
+    assert len(target.calls['write_batch']) > 1
+
+    rows_persisted = 0
+    for call in target.calls['write_batch']:
+        rows_persisted += call['records_count']
+
+    assert rows_persisted == 100
+
+
+def test_loading__invalid__message_type():
+    class TestStream(ListStream):
+        stream = [{'type': 'NOT_A_SINGER_MESSAGE',
+                   'stream': 'abc'}]
+
+    with pytest.raises(target_tools.TargetError, match=r'Unknown message type NOT_A_SINGER_MESSAGE'):
+        target_tools.stream_to_target(TestStream(), Target(), config=CONFIG)
+
+
 def test_record_with_multiple_of():
     values = [1, 1.0, 2, 2.0, 3, 7, 10.1]
     records = []